@@ -3,7 +3,7 @@
 Elyvium Deploy UI (FastAPI + HTML)
 
 - Runs a simple web UI to deploy Backend (always) and optionally Frontend per environment.
-- Prints VERY visible logs in the terminal for every command + shows the same logs in the browser.
+- Prints VERY visible logs in the terminal for every command + streams the same logs live to the browser (SSE).
 
 Run:
   python3 deploy_ui.py
@@ -11,21 +11,53 @@ Run:
 Optional overrides:
   DEPLOY_UI_PORT=8090 python3 deploy_ui.py
   DEPLOY_UI_RELOAD=1 python3 deploy_ui.py
+  DEPLOY_UI_WORKERS=2 python3 deploy_ui.py
 """
 
+import asyncio
+import fcntl
+import hashlib
 import os
+import re
 import shlex
-import subprocess
+import stat
+import tempfile
+import traceback
+from collections import deque
+from contextlib import aclosing
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, Deque, List, Literal, Optional, Dict, Any, Sequence, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
 
+import orjson
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from starlette.types import Receive, Scope, Send
 
-app = FastAPI(title="Elyvium Deploy UI")
+# UI assets (index.html, ...) live next to this script
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+class _GZipExceptStream(GZipMiddleware):
+    """
+    GZipMiddleware that leaves the SSE deploy stream alone: some Starlette
+    releases buffer gzipped text/event-stream bodies until the response ends.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] == "/api/deploy/stream":
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app = FastAPI(title="Elyvium Deploy UI", default_response_class=ORJSONResponse)
+app.add_middleware(_GZipExceptStream, minimum_size=500)
 
 # -----------------------------------------------------------------------------
 # Security guardrails
@@ -35,6 +67,13 @@ ALLOWED_ROOTS = [
     "/home/elyvium/projects/ecosystem/",
 ]
 
+# Absolute, "/"-terminated form used for prefix checks
+_ALLOWED_ABS = tuple(os.path.abspath(r).rstrip("/") + "/" for r in ALLOWED_ROOTS)
+
+# Branch names: must not start with "-" (would be read as a git option) and only
+# use characters that are valid in git refs.
+_BRANCH_RE = re.compile(r"[A-Za-z0-9_][A-Za-z0-9._/-]*")
+
 # -----------------------------------------------------------------------------
 # Environment allowlist
 # -----------------------------------------------------------------------------
@@ -46,7 +85,7 @@ class EnvConfig:
     default_work_back_dir: str
     default_branch: str
     front_deploy_script: Optional[str]
-    backend_compose_command: str
+    backend_compose_command: Tuple[str, ...]  # argv, already split
 
 
 ENVS: List[EnvConfig] = [
@@ -57,7 +96,7 @@ ENVS: List[EnvConfig] = [
         default_work_back_dir="/home/elyvium/projects/ecosystem/elyvium-ecosystem",
         default_branch="sprint/23",
         front_deploy_script="./deploy.sh",
-        backend_compose_command="docker compose -p elyvium-test --env-file .env.test up --build -d",
+        backend_compose_command=("docker", "compose", "-p", "elyvium-test", "--env-file", ".env.test", "up", "--build", "-d"),
     ),
     EnvConfig(
         key="DEV",
@@ -66,22 +105,61 @@ ENVS: List[EnvConfig] = [
         default_work_back_dir="/home/elyvium/projects/ecosystem/elyvium-ecosystem",
         default_branch="sprint/23",
         front_deploy_script=None,  # DEV has no frontend deploy
-        backend_compose_command="docker compose --env-file .env.dev up --build -d",
+        backend_compose_command=("docker", "compose", "--env-file", ".env.dev", "up", "--build", "-d"),
     ),
 ]
 
 ENVS_BY_KEY: Dict[str, EnvConfig] = {e.key: e for e in ENVS}
 
+# /api/envs payload never changes while the process runs: serialize it once.
+_ENVS_PAYLOAD: List[Dict[str, Any]] = [
+    {
+        "env_key": e.key,
+        "name": e.name,
+        "default_work_front_dir": e.default_work_front_dir,
+        "default_work_back_dir": e.default_work_back_dir,
+        "default_branch": e.default_branch,
+        "has_frontend": bool(e.front_deploy_script),
+    }
+    for e in ENVS
+]
+_ENVS_JSON: bytes = orjson.dumps(_ENVS_PAYLOAD)
+_ENVS_ETAG = f'"{hashlib.sha1(_ENVS_JSON).hexdigest()}"'
+
 
 # -----------------------------------------------------------------------------
 # API models
 # -----------------------------------------------------------------------------
 class DeployRequest(BaseModel):
-    env_key: str = Field(..., description="TEST / DEV ...")
+    # Allowed values come straight from ENVS, so new environments need no edit here
+    env_key: Literal[tuple(ENVS_BY_KEY)] = Field(..., description="TEST / DEV ...")  # type: ignore[valid-type]
     work_front_dir: str
     work_back_dir: str
     branch: str
 
+    @field_validator("work_front_dir", "work_back_dir")
+    @classmethod
+    def _under_allowed_roots(cls, v: str) -> str:
+        # Guardrails: prevent pointing to arbitrary system paths
+        p = os.path.abspath(v)
+        if not any(p.startswith(root) for root in _ALLOWED_ABS):
+            raise ValueError(f"Path not allowed: {v}\nAllowed roots: {ALLOWED_ROOTS}")
+        return p
+
+    @field_validator("branch")
+    @classmethod
+    def _valid_branch_name(cls, v: str) -> str:
+        # Ends up as an argument to `git pull` / deploy.sh: no options, only ref-safe names
+        if (
+            not _BRANCH_RE.fullmatch(v)
+            or ".." in v
+            or "//" in v
+            or "/." in v
+            or v.endswith(("/", ".", ".lock"))
+        ):
+            raise ValueError(f"Invalid branch name: {v!r}")
+        return v
+
 
 # -----------------------------------------------------------------------------
 # Visible logging helpers
@@ -90,320 +168,573 @@ def _ts() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+_BANNER_LINE = "█" * 100
+_BOX_TOP = "┏" + "━" * 92 + "┓"
+_BOX_TITLE = "┃ COMMAND" + " " * 84 + "┃"
+_BOX_MID = "┣" + "━" * 92 + "┫"
+_BOX_BOT = "┗" + "━" * 92 + "┛"
+
+
 def _banner(title: str) -> str:
-    line = "█" * 100
-    return f"\n{line}\n█ {_ts()} | {title}\n{line}\n"
+    return f"\n{_BANNER_LINE}\n█ {_ts()} | {title}\n{_BANNER_LINE}\n"
 
 
-def _cmd_block(cmd: List[str], cwd: str) -> str:
+def _cmd_block(cmd: Sequence[str], cwd: str) -> str:
     return (
-        f"\n"
-        f"┏━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-        f"┃ COMMAND                                                                                    ┃\n"
-        f"┣━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┫\n"
+        f"\n{_BOX_TOP}\n{_BOX_TITLE}\n{_BOX_MID}\n"
         f"┃ CWD : {cwd}\n"
-        f"┃ CMD : {' '.join(cmd)}\n"
-        f"┗━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n"
+        f"┃ CMD : {shlex.join(cmd)}\n"
+        f"{_BOX_BOT}\n"
     )
 
 
 # -----------------------------------------------------------------------------
 # Validation helpers
 # -----------------------------------------------------------------------------
-def _is_under_allowed_roots(path: str) -> bool:
-    path = os.path.abspath(path)
-    return any(path.startswith(root) for root in ALLOWED_ROOTS)
+def _assert_same_origin(request: Request) -> None:
+    """
+    Refuses cross-site requests, so another web page open in the operator's
+    browser can't trigger a deploy (e.g. via <img src="/api/deploy/stream?...">).
+    """
+    site = request.headers.get("sec-fetch-site")
+    if site is not None and site != "same-origin":
+        raise HTTPException(status_code=403, detail=f"Cross-site request refused (Sec-Fetch-Site: {site})")
+
+    origin = request.headers.get("origin")
+    if origin is not None and urlsplit(origin).netloc != request.headers.get("host"):
+        raise HTTPException(status_code=403, detail=f"Cross-origin request refused (Origin: {origin})")
 
 
 def _assert_git_repo(path: str) -> None:
-    if not os.path.isdir(path):
-        raise HTTPException(status_code=400, detail=f"Directory not found: {path}")
-    if not os.path.isdir(os.path.join(path, ".git")):
+    # One stat on path/.git: if it's a directory, path exists too.
+    try:
+        st = os.stat(os.path.join(path, ".git"))
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISDIR(st.st_mode):
+        # Failure path only: tell a missing directory apart from a non-repo
+        if not os.path.isdir(path):
+            raise HTTPException(status_code=400, detail=f"Directory not found: {path}")
         raise HTTPException(status_code=400, detail=f"Not a git repo (.git not found): {path}")
 
 
 def _assert_file_exists(path: str) -> None:
-    if not os.path.isfile(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
         raise HTTPException(status_code=400, detail=f"File not found: {path}")
 
 
 # -----------------------------------------------------------------------------
-# Command runner (prints to terminal + returns output to UI)
+# Locks (flock on files, so they hold across uvicorn worker processes too)
 # -----------------------------------------------------------------------------
-def _run_cmd_capture(cmd: List[str], cwd: str) -> str:
+LOCK_DIR = tempfile.gettempdir()
+
+
+def _open_lock(name: str) -> int:
+    return os.open(os.path.join(LOCK_DIR, f"elyvium-deploy-ui.{name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+
+
+def _try_lock(name: str) -> Optional[int]:
+    """
+    Takes an exclusive lock without waiting; returns its fd (close it to release)
+    or None if it is already held, by this or any other process.
+    """
+    fd = _open_lock(name)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+# -----------------------------------------------------------------------------
+# Command runner (prints to terminal + streams output to UI)
+# -----------------------------------------------------------------------------
+# Buffered output (error details, /api/deploy response) keeps only the last
+# N lines per command / step, so a huge docker build log can't exhaust memory.
+OUTPUT_TAIL_LINES = 5000
+
+
+async def _read_lines(stream: asyncio.StreamReader) -> AsyncIterator[bytes]:
     """
-    Runs a command, prints it in a very visible format, and returns combined output.
+    Yields lines from a subprocess pipe. Lines longer than the reader's limit
+    (64 KiB, e.g. minified bundler output) come out in pieces instead of
+    raising ValueError like StreamReader.readline() does.
+    """
+    while True:
+        try:
+            yield await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            # EOF: last line without a trailing newline
+            if e.partial:
+                yield e.partial
+            return
+        except asyncio.LimitOverrunError as e:
+            yield await stream.read(e.consumed)
+
+
+async def _run_cmd_stream(cmd: Sequence[str], cwd: str) -> AsyncIterator[str]:
+    """
+    Runs a command, prints it in a very visible format, and yields its combined
+    output line by line as soon as it is produced.
     Raises HTTPException if the command fails.
+
+    Uses asyncio subprocesses so the event loop keeps serving other requests
+    while git / docker are running.
     """
     # Terminal: very visible command block
     print(_cmd_block(cmd, cwd))
 
-    p = subprocess.run(
-        cmd,
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
         cwd=cwd,
-        text=True,
-        capture_output=True,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
     )
 
-    out = (p.stdout or "") + (p.stderr or "")
+    out: Deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+    async for raw in _read_lines(proc.stdout):
+        line = raw.decode(errors="replace")
+
+        # Terminal: show output in a visible box
+        if not out:
+            print("┌──────────────────────────── OUTPUT ────────────────────────────┐")
+        print(line, end="")
 
-    # Terminal: show output in a visible box
-    if out.strip():
-        print("┌──────────────────────────── OUTPUT ────────────────────────────┐")
-        print(out.rstrip())
+        out.append(line)
+        yield line
+
+    await proc.wait()
+
+    if out:
         print("└───────────────────────────────────────────────────────────────┘")
 
-    if p.returncode != 0:
+    if proc.returncode != 0:
         raise HTTPException(
             status_code=500,
             detail=(
                 f"{_banner('COMMAND FAILED ❌')}"
                 f"{_cmd_block(cmd, cwd)}"
-                f"Exit Code: {p.returncode}\n\n"
-                f"{out}"
+                f"Exit Code: {proc.returncode}\n\n"
+                f"{''.join(out)}"
             ),
         )
 
-    return out
+
+async def _run_cmd_capture(cmd: Sequence[str], cwd: str) -> str:
+    """
+    Runs a command like _run_cmd_stream() and returns the tail of its output once done.
+    """
+    out: Deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+    async for line in _run_cmd_stream(cmd, cwd):
+        out.append(line)
+    return "".join(out)
+
+
+async def _add_safe_directory(path: str) -> None:
+    """
+    Allows this repo path for the current container user.
+    Serialized because concurrent `git config --global` writes fail on ~/.gitconfig.lock.
+    """
+    fd = _open_lock("gitconfig")
+    try:
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        await _run_cmd_capture(
+            ["git", "config", "--global", "--add", "safe.directory", os.path.abspath(path)],
+            cwd=path,
+        )
+    finally:
+        os.close(fd)
+
+
+async def _run_sequentially(steps: Dict[str, AsyncIterator[str]]) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Same contract as _run_concurrently(), but one step after the other; a
+    failing step stops the ones after it.
+    """
+    for source, chunks in steps.items():
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                yield source, chunk
+
+
+async def _run_concurrently(steps: Dict[str, AsyncIterator[str]]) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Runs several deploy steps at once (asyncio.gather) and yields (source, chunk)
+    pairs in the order they are produced. A failing step does not interrupt the
+    others (killing git / docker midway would leave a half-applied deploy);
+    once all have finished, the first failure is re-raised.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def pump(source: str, chunks: AsyncIterator[str]) -> None:
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                await queue.put((source, chunk))
+
+    async def run_all() -> None:
+        try:
+            results = await asyncio.gather(
+                *(pump(source, chunks) for source, chunks in steps.items()),
+                return_exceptions=True,
+            )
+        finally:
+            queue.put_nowait(finished)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    runner = asyncio.create_task(run_all())
+    try:
+        while (item := await queue.get()) is not finished:
+            yield item
+        await runner
+    finally:
+        if not runner.done():
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
 
 
 # -----------------------------------------------------------------------------
-# Deploy steps
+# Deploy steps (async generators yielding log chunks for the UI)
 # -----------------------------------------------------------------------------
-def _deploy_frontend(env: EnvConfig, work_front_dir: str, branch: str) -> str:
-    log = _banner(f"FRONTEND DEPLOY | {env.name}")
+async def _deploy_frontend(env: EnvConfig, work_front_dir: str, branch: str) -> AsyncIterator[str]:
+    yield _banner(f"FRONTEND DEPLOY | {env.name}")
 
     if not env.front_deploy_script:
-        log += "[Frontend] Skipped (not configured for this environment)\n"
-        return log
+        yield "[Frontend] Skipped (not configured for this environment)\n"
+        return
 
     _assert_git_repo(work_front_dir)
 
-    # allow this repo path for the current container user
-    safe_dir = os.path.abspath(work_front_dir)
-    _run_cmd_capture(
-        ["git", "config", "--global", "--add", "safe.directory", safe_dir],
-        cwd=work_front_dir,
-    )
+    await _add_safe_directory(work_front_dir)
 
     script_path = os.path.join(work_front_dir, env.front_deploy_script)
     _assert_file_exists(script_path)
 
-    log += f"Frontend Directory : {work_front_dir}\n"
-    log += f"Deploy Script      : {script_path}\n"
-    log += f"Branch             : {branch}\n"
+    yield f"Frontend Directory : {work_front_dir}\n"
+    yield f"Deploy Script      : {script_path}\n"
+    yield f"Branch             : {branch}\n"
 
     cmd = ["bash", script_path, branch]
-    log += _cmd_block(cmd, work_front_dir)
-    log += _run_cmd_capture(cmd, cwd=work_front_dir)
+    yield _cmd_block(cmd, work_front_dir)
+    async for line in _run_cmd_stream(cmd, cwd=work_front_dir):
+        yield line
 
-    log += "\n[Frontend] Done ✅\n"
-    return log
+    yield "\n[Frontend] Done ✅\n"
 
 
-def _deploy_backend(env: EnvConfig, work_back_dir: str, branch: str) -> str:
-    log = _banner(f"BACKEND DEPLOY | {env.name}")
+async def _deploy_backend(env: EnvConfig, work_back_dir: str, branch: str) -> AsyncIterator[str]:
+    yield _banner(f"BACKEND DEPLOY | {env.name}")
 
     _assert_git_repo(work_back_dir)
 
-      # allow this repo path for the current container user
-    safe_dir = os.path.abspath(work_back_dir)
-    _run_cmd_capture(
-        ["git", "config", "--global", "--add", "safe.directory", safe_dir],
-        cwd=work_back_dir,
-    )
-    
-    log += f"Backend Directory  : {work_back_dir}\n"
-    log += f"Branch             : {branch}\n"
-    log += f"Docker Compose     : {env.backend_compose_command}\n"
+    await _add_safe_directory(work_back_dir)
 
-    cmd1 = ["git", "fetch", "origin"]
-    log += _cmd_block(cmd1, work_back_dir)
-    log += _run_cmd_capture(cmd1, cwd=work_back_dir)
+    yield f"Backend Directory  : {work_back_dir}\n"
+    yield f"Branch             : {branch}\n"
+    yield f"Docker Compose     : {shlex.join(env.backend_compose_command)}\n"
 
-    cmd2 = ["git", "pull", "origin", branch]
-    log += _cmd_block(cmd2, work_back_dir)
-    log += _run_cmd_capture(cmd2, cwd=work_back_dir)
+    # git pull fetches by itself; --ff-only fails fast on diverged history
+    # instead of attempting a merge
+    cmd = ["git", "pull", "--ff-only", "origin", branch]
+    yield _cmd_block(cmd, work_back_dir)
+    async for line in _run_cmd_stream(cmd, cwd=work_back_dir):
+        yield line
 
-    compose_args = shlex.split(env.backend_compose_command)
-    log += _cmd_block(compose_args, work_back_dir)
-    log += _run_cmd_capture(compose_args, cwd=work_back_dir)
+    compose_args = env.backend_compose_command
+    yield _cmd_block(compose_args, work_back_dir)
+    async for line in _run_cmd_stream(compose_args, cwd=work_back_dir):
+        yield line
 
-    log += "\n[Backend] Done ✅\n"
-    return log
+    yield "\n[Backend] Done ✅\n"
+
+
+async def _deploy_steps(env: EnvConfig, req: DeployRequest) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Full deploy of one environment, yielded as (source, chunk) pairs.
+    Frontend and backend run concurrently (source "frontend" / "backend") unless
+    they share a work directory, then one after the other;
+    the surrounding banners have source "".
+    Runs inside a background deploy job (see _start_deploy), never directly in a request.
+    """
+    # Terminal big banner
+    print(_banner(f"DEPLOY STARTED | {env.name}"))
+    print(f"work_front_dir: {req.work_front_dir}")
+    print(f"work_back_dir : {req.work_back_dir}")
+    print(f"branch        : {req.branch}")
+
+    yield "", _banner(f"DEPLOY STARTED | {env.name}")
+    yield "", f"work_front_dir: {req.work_front_dir}\n"
+    yield "", f"work_back_dir : {req.work_back_dir}\n"
+    yield "", f"branch        : {req.branch}\n"
+
+    steps = {
+        "frontend": _deploy_frontend(env, req.work_front_dir, req.branch),
+        "backend": _deploy_backend(env, req.work_back_dir, req.branch),
+    }
+    if os.path.abspath(req.work_front_dir) == os.path.abspath(req.work_back_dir):
+        # Same checkout: concurrent git / deploy.sh would collide on .git/index.lock
+        run = _run_sequentially(steps)
+    else:
+        run = _run_concurrently(steps)
+    async with aclosing(run) as items:
+        async for item in items:
+            yield item
+
+    yield "", _banner(f"DEPLOY FINISHED ✅ | {env.name}")
+    print(_banner(f"DEPLOY FINISHED ✅ | {env.name}"))
+
+
+# -----------------------------------------------------------------------------
+# Deploy jobs (run in the background, independent of the HTTP connection)
+# -----------------------------------------------------------------------------
+class _DeployJob:
+    """
+    Output channel of one running deploy. The deploy itself runs in a background
+    task, so a dropped connection (closed tab, proxy timeout) never aborts git or
+    docker midway; the terminal still gets the full log.
+    """
+
+    def __init__(self) -> None:
+        # Bounded: a follower that is too slow (or never started reading) must
+        # not make us hold the whole docker build log in memory.
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=OUTPUT_TAIL_LINES)
+        self.listening = True
+
+    def emit(self, item: Any) -> None:
+        if not self.listening:
+            return
+        if self.queue.full():
+            # Cut the follower off: drop the oldest chunk to make room for the
+            # failure; the deploy carries on and the terminal has the full log.
+            self.listening = False
+            self.queue.get_nowait()
+            item = HTTPException(
+                status_code=503,
+                detail="Deploy output fell behind and was cut off; the deploy keeps running (see server log).",
+            )
+        self.queue.put_nowait(item)
+
+    async def follow(self) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yields the deploy's (source, chunk) pairs; re-raises its failure at the end.
+        """
+        try:
+            while (item := await self.queue.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Caller went away: the deploy carries on, stop buffering its output
+            self.listening = False
+
+
+# Strong references to running deploys so they aren't garbage collected
+_deploy_tasks: Set["asyncio.Task[None]"] = set()
+
+
+async def _run_deploy(job: _DeployJob, env: EnvConfig, req: DeployRequest, lock_fds: List[int]) -> None:
+    try:
+        async for item in _deploy_steps(env, req):
+            job.emit(item)
+            # Let local followers drain the queue between lines of a fast burst
+            await asyncio.sleep(0)
+        job.emit(None)
+    except Exception as e:
+        if not isinstance(e, HTTPException):
+            # Unexpected: keep the traceback on the terminal, the UI gets the message
+            print(_banner("DEPLOY CRASHED ❌"))
+            traceback.print_exc()
+        job.emit(e)
+    finally:
+        for fd in lock_fds:
+            os.close(fd)
+
+
+def _start_deploy(env: EnvConfig, req: DeployRequest) -> _DeployJob:
+    """
+    Starts a deploy in the background and returns the job to follow its output.
+    Raises HTTPException(409) if one of its work directories is already being
+    deployed (by any environment, in any worker process).
+    """
+    # Lock the checkouts rather than the env: TEST and DEV share the same repos
+    lock_fds: List[int] = []
+    for path in sorted({os.path.abspath(req.work_front_dir), os.path.abspath(req.work_back_dir)}):
+        fd = _try_lock("dir-" + hashlib.sha1(path.encode()).hexdigest()[:16])
+        if fd is None:
+            for held in lock_fds:
+                os.close(held)
+            raise HTTPException(status_code=409, detail=f"Deploy already in progress in {path}")
+        lock_fds.append(fd)
+
+    job = _DeployJob()
+    task = asyncio.create_task(_run_deploy(job, env, req, lock_fds))
+    _deploy_tasks.add(task)
+    task.add_done_callback(_deploy_tasks.discard)
+    return job
+
+
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {orjson.dumps(data).decode()}\n\n"
+
+
+async def _failed_stream(detail: Any) -> AsyncIterator[str]:
+    yield _sse({"detail": detail}, event="failed")
+
+
+def _validation_detail(e: ValidationError) -> str:
+    # Prefer the validator's own message ("Path not allowed: ...") over pydantic's wrapping
+    return "\n".join(
+        f"{'.'.join(map(str, err['loc']))}: {err.get('ctx', {}).get('error', err['msg'])}"
+        for err in e.errors()
+    )
+
+
+async def event_stream(env: EnvConfig, job: _DeployJob) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for a deploy:
+    - default "message" events carry {"line": ..., "source": ...} as output is produced
+    - "failed" carries {"detail": ...} when a step fails (or anything else goes wrong)
+    - "done" marks success (the UI closes the EventSource so it won't reconnect)
+    """
+    try:
+        async for source, chunk in job.follow():
+            yield _sse({"line": chunk, "source": source})
+    except HTTPException as e:
+        yield _sse({"detail": e.detail}, event="failed")
+        return
+    except Exception as e:
+        yield _sse({"detail": f"Deploy failed: {e!r}"}, event="failed")
+        return
+
+    yield _sse({"ok": True, "env": env.name}, event="done")
 
 
 # -----------------------------------------------------------------------------
 # API endpoints
 # -----------------------------------------------------------------------------
 @app.get("/api/envs")
-def list_envs() -> List[Dict[str, Any]]:
-    return [
-        {
-            "env_key": e.key,
-            "name": e.name,
-            "default_work_front_dir": e.default_work_front_dir,
-            "default_work_back_dir": e.default_work_back_dir,
-            "default_branch": e.default_branch,
-            "has_frontend": bool(e.front_deploy_script),
-        }
-        for e in ENVS
-    ]
+def list_envs(request: Request) -> Response:
+    headers = {"ETag": _ENVS_ETAG, "Cache-Control": "public, max-age=60"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if _ENVS_ETAG in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(_ENVS_JSON, media_type="application/json", headers=headers)
 
 
 @app.post("/api/deploy")
-def deploy(req: DeployRequest) -> Dict[str, Any]:
-    env = ENVS_BY_KEY.get(req.env_key)
-    if not env:
-        raise HTTPException(status_code=400, detail="Invalid env_key (not in allowlist).")
-
-    # Guardrails: prevent pointing to arbitrary system paths
-    for p in [req.work_front_dir, req.work_back_dir]:
-        if not _is_under_allowed_roots(p):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Path not allowed: {p}\nAllowed roots: {ALLOWED_ROOTS}",
-            )
+async def deploy(req: DeployRequest, request: Request) -> Dict[str, Any]:
+    _assert_same_origin(request)
+    env = ENVS_BY_KEY[req.env_key]
+
+    # Steps run concurrently; keep the response readable by grouping their
+    # output (frontend, then backend) between the surrounding banners.
+    parts: List[str] = []
+    steps: Dict[str, Deque[str]] = {
+        "frontend": deque(maxlen=OUTPUT_TAIL_LINES),
+        "backend": deque(maxlen=OUTPUT_TAIL_LINES),
+    }
+    job = _start_deploy(env, req)
+    async for source, chunk in job.follow():
+        if source:
+            steps[source].append(chunk)
+            continue
+        for chunks in steps.values():
+            parts.extend(chunks)
+            chunks.clear()
+        parts.append(chunk)
+
+    return {"ok": True, "env": env.name, "output": "".join(parts)}
+
+
+@app.get("/api/deploy/stream")
+async def deploy_stream(request: Request) -> StreamingResponse:
+    # EventSource can't read the body of a 4xx response, so rejected requests
+    # (cross-site, validation errors, deploy already running) become a "failed" event.
+    try:
+        _assert_same_origin(request)
+        req = DeployRequest.model_validate(dict(request.query_params))
+        env = ENVS_BY_KEY[req.env_key]
+        job = _start_deploy(env, req)
+        body = event_stream(env, job)
+    except ValidationError as e:
+        body = _failed_stream(_validation_detail(e))
+    except HTTPException as e:
+        body = _failed_stream(e.detail)
+
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # Terminal big banner
-    print(_banner(f"DEPLOY STARTED | {env.name}"))
-    print(f"work_front_dir: {req.work_front_dir}")
-    print(f"work_back_dir : {req.work_back_dir}")
-    print(f"branch        : {req.branch}")
 
-    log = ""
-    log += _banner(f"DEPLOY STARTED | {env.name}")
-    log += f"work_front_dir: {req.work_front_dir}\n"
-    log += f"work_back_dir : {req.work_back_dir}\n"
-    log += f"branch        : {req.branch}\n"
+# -----------------------------------------------------------------------------
+# UI page + assets
+# -----------------------------------------------------------------------------
+# Real path of each hashed asset -> the digest _asset_url() put in its URL
+_ASSET_DIGESTS: Dict[str, str] = {}
 
-    log += _deploy_frontend(env, req.work_front_dir, req.branch)
-    log += _deploy_backend(env, req.work_back_dir, req.branch)
 
-    log += _banner(f"DEPLOY FINISHED ✅ | {env.name}")
-    print(_banner(f"DEPLOY FINISHED ✅ | {env.name}"))
+class _AssetFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers cache content-hashed URLs (?v=<hash>) forever,
+    as long as the hash is the one the page currently links to.
+    """
 
-    return {"ok": True, "env": env.name, "output": log}
-
-
-@app.get("/", response_class=HTMLResponse)
-def ui() -> str:
-    return """
-<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8"/>
-  <title>Elyvium Deploy UI</title>
-  <style>
-    body { font-family: system-ui; padding: 18px; max-width: 980px; margin: 0 auto; }
-    .row { display: grid; grid-template-columns: 180px 1fr; gap: 10px; margin: 10px 0; align-items: center; }
-    input, select { padding: 10px; border: 1px solid #ddd; border-radius: 8px; width: 100%; }
-    button { padding: 10px 14px; border: 0; border-radius: 10px; cursor: pointer; }
-    button.primary { background: #111; color: #fff; }
-    .hint { color: #666; font-size: 13px; margin-top: 4px; }
-    pre { background: #0b0b0b; color: #d7ffd7; padding: 14px; border-radius: 12px; overflow: auto; min-height: 240px; }
-    .badge { display: inline-block; padding: 3px 8px; border-radius: 999px; background: #f2f2f2; font-size: 12px; margin-left: 8px; }
-  </style>
-</head>
-<body>
-  <h2>Elyvium Deploy UI</h2>
-  <div class="hint">Select an environment, adjust inputs if needed, then deploy.</div>
-
-  <div class="row">
-    <label>Environment</label>
-    <div>
-      <select id="env"></select>
-      <div class="hint" id="envHint"></div>
-    </div>
-  </div>
-
-  <div class="row">
-    <label>work_front_dir</label>
-    <input id="workFront" />
-  </div>
-
-  <div class="row">
-    <label>work_back_dir</label>
-    <input id="workBack" />
-  </div>
-
-  <div class="row">
-    <label>branch</label>
-    <input id="branch" />
-  </div>
-
-  <div style="margin: 14px 0;">
-    <button class="primary" onclick="deploy()">Deploy</button>
-  </div>
-
-  <h3>Output</h3>
-  <pre id="out">Ready…</pre>
-
-  <script>
-    let envs = [];
-
-    async function loadEnvs() {
-      const res = await fetch('/api/envs');
-      envs = await res.json();
-
-      const sel = document.getElementById('env');
-      sel.innerHTML = envs.map(e => `<option value="${e.env_key}">${e.name}</option>`).join('');
-      sel.addEventListener('change', onEnvChange);
-
-      onEnvChange();
-    }
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        digest = _ASSET_DIGESTS.get(os.path.realpath(full_path))
+        if digest is not None and query.get("v") == [digest]:
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
-    function onEnvChange() {
-      const key = document.getElementById('env').value;
-      const env = envs.find(e => e.env_key === key);
-      if (!env) return;
 
-      document.getElementById('workFront').value = env.default_work_front_dir || '';
-      document.getElementById('workBack').value = env.default_work_back_dir || '';
-      document.getElementById('branch').value = env.default_branch || '';
+def _asset_url(name: str) -> str:
+    path = os.path.realpath(os.path.join(STATIC_DIR, name))
+    with open(path, "rb") as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:8]
+    _ASSET_DIGESTS[path] = digest
+    return f"/static/{name}?v={digest}"
 
-      const hint = document.getElementById('envHint');
-      hint.innerHTML = env.has_frontend
-        ? `Frontend deploy: <span class="badge">enabled</span>`
-        : `Frontend deploy: <span class="badge">skipped</span>`;
-    }
 
-    async function deploy() {
-      const out = document.getElementById('out');
-      out.textContent = 'Deploying...';
-
-      const payload = {
-        env_key: document.getElementById('env').value,
-        work_front_dir: document.getElementById('workFront').value.trim(),
-        work_back_dir: document.getElementById('workBack').value.trim(),
-        branch: document.getElementById('branch').value.trim(),
-      };
-
-      try {
-        const res = await fetch('/api/deploy', {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify(payload),
-        });
-
-        const data = await res.json();
-
-        if (!res.ok) {
-          out.textContent = (data && data.detail) ? data.detail : 'Deploy failed';
-          return;
-        }
-
-        out.textContent = data.output || 'Done';
-      } catch (e) {
-        out.textContent = 'Network/Server error: ' + e;
-      }
-    }
+def _render_index() -> bytes:
+    with open(os.path.join(STATIC_DIR, "index.html"), encoding="utf-8") as f:
+        html = f.read()
+    for name in ("app.css", "app.js"):
+        html = html.replace(f'"/static/{name}"', f'"{_asset_url(name)}"')
+    return html.encode()
+
+
+# Assets are hashed once at startup; the page itself is never cached so it
+# always points at the current hashes.
+_INDEX_HTML = _render_index()
+_INDEX_HEADERS = {
+    "Cache-Control": "no-store",
+    "Content-Security-Policy": "default-src 'self'",
+}
+
+app.mount("/static", _AssetFiles(directory=STATIC_DIR), name="static")
 
-    loadEnvs();
-  </script>
-</body>
-</html>
-    """.strip()
+
+@app.get("/")
+def ui() -> HTMLResponse:
+    return HTMLResponse(_INDEX_HTML, headers=_INDEX_HEADERS)
 
 
 # -----------------------------------------------------------------------------
@@ -413,17 +744,27 @@ if __name__ == "__main__":
     HOST = os.getenv("DEPLOY_UI_HOST", "0.0.0.0")
     PORT = int(os.getenv("DEPLOY_UI_PORT", "7070"))
     RELOAD = os.getenv("DEPLOY_UI_RELOAD", "0") == "1"
+    # Deploys are async, so one worker already runs them concurrently.
+    # Deploy locks are file based, so extra workers stay safe.
+    WORKERS = int(os.getenv("DEPLOY_UI_WORKERS", "1"))
 
     print(_banner("ELYVIUM DEPLOY UI SERVER"))
     print(f"Listening on: http://{HOST}:{PORT}")
     print(f"Reload mode : {'ON' if RELOAD else 'OFF'}")
+    print(f"Workers     : {1 if RELOAD else WORKERS}")
     print(f"Allowed roots: {ALLOWED_ROOTS}")
 
-    if RELOAD:
-        # Reload requires an import string "module:app"
-        module_name = os.path.splitext(os.path.basename(__file__))[0]
-        uvicorn.run(f"{module_name}:app", host=HOST, port=PORT, reload=True)
-    else:
-        uvicorn.run(app, host=HOST, port=PORT)
+    # Reload and workers > 1 both require an import string "module:app"
+    module_name = os.path.splitext(os.path.basename(__file__))[0]
+    uvicorn.run(
+        f"{module_name}:app",
+        host=HOST,
+        port=PORT,
+        reload=RELOAD,
+        workers=None if RELOAD else WORKERS,
+        # "auto" picks uvloop / httptools when installed (uvicorn[standard])
+        loop="auto",
+        http="auto",
+    )
 
 
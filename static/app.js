@@ -0,0 +1,82 @@
+let envs = [];
+
+async function loadEnvs() {
+  const res = await fetch('/api/envs');
+  envs = await res.json();
+
+  const sel = document.getElementById('env');
+  sel.innerHTML = envs.map(e => `<option value="${e.env_key}">${e.name}</option>`).join('');
+  sel.addEventListener('change', onEnvChange);
+
+  onEnvChange();
+}
+
+function onEnvChange() {
+  const key = document.getElementById('env').value;
+  const env = envs.find(e => e.env_key === key);
+  if (!env) return;
+
+  document.getElementById('workFront').value = env.default_work_front_dir || '';
+  document.getElementById('workBack').value = env.default_work_back_dir || '';
+  document.getElementById('branch').value = env.default_branch || '';
+
+  const hint = document.getElementById('envHint');
+  hint.innerHTML = env.has_frontend
+    ? `Frontend deploy: <span class="badge">enabled</span>`
+    : `Frontend deploy: <span class="badge">skipped</span>`;
+}
+
+function deploy() {
+  const out = document.getElementById('out');
+  out.textContent = 'Deploying...';
+
+  const params = new URLSearchParams({
+    env_key: document.getElementById('env').value,
+    work_front_dir: document.getElementById('workFront').value.trim(),
+    work_back_dir: document.getElementById('workBack').value.trim(),
+    branch: document.getElementById('branch').value.trim(),
+  });
+
+  const source = new EventSource('/api/deploy/stream?' + params);
+  let started = false;
+  let finished = false;
+
+  source.onmessage = (e) => {
+    if (!started) {
+      out.textContent = '';
+      started = true;
+    }
+    // Frontend and backend run concurrently: tag their lines so they stay readable
+    const data = JSON.parse(e.data);
+    out.append(data.source ? data.line.replace(/^(?=.)/gm, `[${data.source}] `) : data.line);
+    out.scrollTop = out.scrollHeight;
+  };
+
+  source.addEventListener('done', () => {
+    finished = true;
+    source.close();
+  });
+
+  source.addEventListener('failed', (e) => {
+    finished = true;
+    source.close();
+    // Rejected requests (bad path, unknown env, deploy in progress) fail before any output
+    const detail = JSON.parse(e.data).detail;
+    if (started) {
+      out.append('\n' + detail);
+    } else {
+      out.textContent = detail;
+    }
+  });
+
+  source.onerror = () => {
+    // Never let EventSource auto-reconnect: that would start a second deploy.
+    source.close();
+    if (!finished) {
+      out.append('\nDeploy stream connection lost (the deploy keeps running on the server)');
+    }
+  };
+}
+
+document.getElementById('deployBtn').addEventListener('click', deploy);
+loadEnvs();